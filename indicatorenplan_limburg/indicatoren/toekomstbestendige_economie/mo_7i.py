@@ -10,10 +10,13 @@ from collections.abc import Sequence
 
 from indicatorenplan_limburg.configs.paths import get_path_data
 from indicatorenplan_limburg.processing.load import load_data_vrl
+from indicatorenplan_limburg.processing.store import OutputStore
 
 # Constants
 RANGES_GROOTTEKLASSE = ('0_9', '10_49', '50_99', '100_249', '250_9999')
+INDICATOR_CODE = 'mo_7i'
 OUTPUT_FILENAME = "MO_7i Vestigingen per grootteklasse per sector.xlsx"
+STORE_DIRNAME = 'store'
 
 # Mapping of SBI names to shorter name categories, easier to display
 SBI_DICT = {
@@ -199,35 +202,43 @@ def get_metadata() -> dict:
     return metadata_dict
 
 
-def save_data(df_data: pd.DataFrame, metadata_dict: dict, save_path=None) -> None:
-    """Save the processing to a csv file
+def save_data(df_data: pd.DataFrame, metadata_dict: dict, save_path=None, publish: bool = True) -> None:
+    """Save the processing to the partitioned output store and publish it as excel file
+
+    Only the periods in `df_data` that are new or changed are written, periods stored in an earlier run are kept.
 
     Args:
         df_data (pd.DataFrame): dataframe to save
         metadata_dict (dict): metadata dictionary
         save_path (Path, optional): path to save the processing. Defaults to None.
+        publish (bool, optional): assemble the excel file from the store. Defaults to True.
     """
     if not save_path:
         save_path = get_path_data(name='vrl', subfolder='processed')
+    save_path = Path(save_path)
     path_file = save_path / OUTPUT_FILENAME
 
-    # save processing to excel with multiple sheets
-    with pd.ExcelWriter(path_file, engine='openpyxl') as writer:
-        # expand all cells
-
-        df_data.to_excel(writer, sheet_name='processing', index=False)
-        for sheet_name, df_meta in metadata_dict.items():
-            df_meta.to_excel(writer, sheet_name=sheet_name, index=False)
+    # write new or changed periods and metadata to the store
+    store = OutputStore(root=save_path / STORE_DIRNAME, indicator=INDICATOR_CODE)
+    written = store.write(df_data, metadata_dict)
+    print(f"Updated {len(written)} partitions in {store.path}")
 
-    print(f"Data saved to {path_file}")
+    # save processing to excel with multiple sheets, only rebuilt when the store changed
+    if publish:
+        store.publish(path_file)
 
 
-def main(years: Sequence[int] = (2023, 2024), n_rows: int | None = None, save_path: str | Path | None = None) -> None:
+def main(years: Sequence[int] = (2023, 2024), n_rows: int | None = None, save_path: str | Path | None = None,
+         publish: bool = True) -> None:
     """Main function to load, transform and save the processing
+
+    Only the given years are loaded and written, years saved in an earlier run are kept in the output.
+
     Args:
         years (Sequence[int], optional): years to load. Defaults to (2023, 2024).
         n_rows (int | None, optional): number of rows to load. Mainly for testing. Defaults to None.
         save_path (str | Path | None, optional): path to save the processing. Defaults to None.
+        publish (bool, optional): assemble the excel file after saving. Defaults to True.
 
     Returns:
         None
@@ -244,14 +255,14 @@ def main(years: Sequence[int] = (2023, 2024), n_rows: int | None = None, save_pa
     # Merge the processing for multiple years
     df_data = concat_data(list_df)
 
-    # sort the processing
+    # sort the processing of the loaded years, partitions are stored per period so no need to sort the full history
     df_data = df_data.sort_values(by=['period', 'dim_sbi_1', 'dim_grootte_1'])
 
     # get metadata
     metadata_dict = get_metadata()
 
     # save the processing
-    save_data(df_data, metadata_dict, save_path=save_path)
+    save_data(df_data, metadata_dict, save_path=save_path, publish=publish)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+"""Helpers for writing output files safely."""
+import os
+from collections.abc import Callable
+from pathlib import Path
+from uuid import uuid4
+
+
+def atomic_write(path_file: Path, write_fn: Callable[[Path], None]) -> None:
+    """Write a file atomically: `write_fn` writes to a temporary path, which then replaces `path_file`.
+
+    The temporary file has a unique name in the same directory, so concurrent writers do not clash and readers see
+    either the old or the new file, never a half-written one. It is created as a regular file, so it gets the
+    permissions set by the umask of the process.
+
+    Args:
+        path_file (Path): path of the file to write.
+        write_fn (Callable[[Path], None]): function that writes the content to the given temporary path.
+    """
+    path_file = Path(path_file)
+    path_tmp = path_file.parent / f".{path_file.name}.{uuid4().hex}{path_file.suffix}"
+    # create the file exclusively, so that it is never shared with another writer
+    with open(path_tmp, 'x'):
+        pass
+    try:
+        write_fn(path_tmp)
+        os.replace(path_tmp, path_file)
+    except BaseException:
+        path_tmp.unlink(missing_ok=True)
+        raise
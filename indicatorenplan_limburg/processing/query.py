@@ -0,0 +1,258 @@
+"""Indexed, in-process queries over computed indicator outputs.
+
+Loads the standard `period/geolevel/geoitem/dim_*` tables of the indicator outputs once, builds hash indexes on
+the key columns and a sorted index on `period`, and answers point and range queries without re-reading the
+workbooks. Materialized slices are kept in an LRU cache and an indicator is reloaded automatically when the
+fingerprint of its output file changes.
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Mapping, Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicatorenplan_limburg.configs.paths import get_path_data
+
+KEY_COLUMNS = ('period', 'geolevel', 'geoitem')
+DATA_SHEET_NAME = 'processing'
+
+
+def get_output_paths() -> dict[str, Path]:
+    """Get the default output files of the implemented indicators, keyed by indicator code."""
+    # imported here to avoid a circular import, the indicator modules depend on processing
+    from indicatorenplan_limburg.indicatoren.toekomstbestendige_economie import mo_7i
+
+    return {
+        'mo_7i': get_path_data(name='vrl', subfolder='processed') / mo_7i.OUTPUT_FILENAME,
+    }
+
+
+def file_fingerprint(path: Path) -> tuple[int, int]:
+    """Get a cheap fingerprint of a file: modification time in nanoseconds and size in bytes."""
+    stat = path.expanduser().stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_key_columns(df: pd.DataFrame) -> list[str]:
+    """Get the key columns of a standard indicator table, i.e. `period`, `geolevel`, `geoitem` and all `dim_*`."""
+    return [col for col in df.columns if col in KEY_COLUMNS or col.startswith('dim_')]
+
+
+class IndicatorIndex:
+    """Indexes on the key columns of a single indicator table.
+
+    Every key column gets a hash index mapping a value to the (sorted) row positions holding that value. The
+    `period` column additionally gets a sorted index, so that period ranges are resolved with a binary search.
+
+    Args:
+        df (pd.DataFrame): standard indicator table with at least a `period` column.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        if 'period' not in df.columns:
+            raise ValueError("Indicator table has no 'period' column")
+
+        self.df = df.reset_index(drop=True)
+        self.key_columns = get_key_columns(self.df)
+
+        # periods as numbers where they parse, e.g. '2023' (as built by mo_11a) and 2023 are the same period, while
+        # non-numeric periods such as '2023Q1' are indexed as they are
+        periods = pd.to_numeric(self.df['period'], errors='coerce')
+        periods_key = periods.astype(object).where(periods.notna(), self.df['period'])
+
+        # hash index per key column: value -> row positions
+        self.hash_index = {}
+        for col in self.key_columns:
+            values = periods_key if col == 'period' else self.df[col]
+            codes, uniques = pd.factorize(values, sort=False)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.hash_index[col] = {
+                _normalize_value(value): order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+        # sorted index on period: sorted values and the matching row positions, only numeric periods are in range
+        periods = periods.to_numpy(dtype=float)
+        self.period_order = np.argsort(periods, kind='stable')
+        self.period_sorted = periods[self.period_order]
+
+    def lookup(self, column: str, values: Hashable | Sequence[Hashable]) -> np.ndarray:
+        """Get the sorted row positions where `column` equals one of `values`."""
+        if column not in self.hash_index:
+            raise KeyError(f"'{column}' is not a key column, choose from {self.key_columns}")
+
+        normalize = _to_period if column == 'period' else _normalize_value
+        if _is_multi_value(values):
+            arrays = [self.hash_index[column].get(normalize(v), _EMPTY) for v in values]
+            return np.unique(np.concatenate(arrays)) if arrays else _EMPTY
+        return self.hash_index[column].get(normalize(values), _EMPTY)
+
+    def lookup_period_range(self, start: int | None = None, end: int | None = None) -> np.ndarray:
+        """Get the sorted row positions with `start <= period <= end`. Open bounds are given as None."""
+        lb = 0 if start is None else np.searchsorted(self.period_sorted, _to_period(start), side='left')
+        ub = len(self.period_sorted) if end is None else np.searchsorted(self.period_sorted, _to_period(end),
+                                                                         side='right')
+        return np.sort(self.period_order[lb:ub])
+
+    def select(self, period_range: tuple[int | None, int | None] | None = None, **filters) -> pd.DataFrame:
+        """Select the rows matching all filters.
+
+        Args:
+            period_range (tuple, optional): inclusive (start, end) range of periods. Defaults to None.
+            **filters: key column filters, each either a single value or a list of values.
+
+        Returns:
+            pd.DataFrame: matching rows, in the original row order.
+        """
+        positions = None
+        if period_range is not None:
+            positions = self.lookup_period_range(*period_range)
+
+        # intersect the smallest candidate sets first
+        candidates = sorted((self.lookup(col, values) for col, values in filters.items()), key=len)
+        for candidate in candidates:
+            if positions is None:
+                positions = candidate
+            else:
+                positions = np.intersect1d(positions, candidate, assume_unique=True)
+            if len(positions) == 0:
+                break
+
+        if positions is None:
+            return self.df
+        return self.df.iloc[positions]
+
+
+class IndicatorQuery:
+    """Query layer over the outputs of multiple indicators.
+
+    Outputs are loaded lazily on first use and reloaded when the fingerprint of the output file changes. The
+    fingerprints are checked at most once every `check_interval` seconds.
+
+    Slices returned from the cache are shared between callers and should not be modified in place.
+
+    Args:
+        paths (Mapping[str, Path], optional): output file per indicator code. Defaults to `get_output_paths()`.
+        cache_size (int, optional): maximum number of materialized slices in the LRU cache. Defaults to 1024.
+        check_interval (float, optional): minimum number of seconds between fingerprint checks. Defaults to 1.0.
+    """
+
+    def __init__(self, paths: Mapping[str, str | Path] | None = None, cache_size: int = 1024,
+                 check_interval: float = 1.0):
+        if paths is None:
+            paths = get_output_paths()
+        self.paths = {code: Path(path).expanduser() for code, path in paths.items()}
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+
+        self._indexes = {}
+        self._fingerprints = {}
+        self._last_checked = {}
+        self._cache = OrderedDict()
+
+    @property
+    def indicators(self) -> list[str]:
+        """Get the codes of the indicators that can be queried."""
+        return list(self.paths)
+
+    def load(self, indicator: str) -> IndicatorIndex:
+        """(Re)load the output of an indicator and build its indexes."""
+        if indicator not in self.paths:
+            raise KeyError(f"Unknown indicator '{indicator}', choose from {self.indicators}")
+
+        path = self.paths[indicator]
+        fingerprint = file_fingerprint(path)
+        df = pd.read_excel(path, sheet_name=DATA_SHEET_NAME, engine='openpyxl')
+
+        self._indexes[indicator] = IndicatorIndex(df)
+        self._fingerprints[indicator] = fingerprint
+        self._last_checked[indicator] = time.monotonic()
+        self._invalidate(indicator)
+        return self._indexes[indicator]
+
+    def get_index(self, indicator: str) -> IndicatorIndex:
+        """Get the index of an indicator, reloading it if its output file has changed."""
+        if indicator not in self._indexes:
+            return self.load(indicator)
+
+        now = time.monotonic()
+        if now - self._last_checked[indicator] >= self.check_interval:
+            self._last_checked[indicator] = now
+            if file_fingerprint(self.paths[indicator]) != self._fingerprints[indicator]:
+                return self.load(indicator)
+        return self._indexes[indicator]
+
+    def query(self, indicator: str, period_range: tuple[int | None, int | None] | None = None,
+              **filters) -> pd.DataFrame:
+        """Query the output of an indicator.
+
+        Examples:
+            >>> q = IndicatorQuery()
+            >>> q.query('mo_7i', period=2024, geoitem='pv31', dim_sbi_1='industrie', dim_grootte_1='0_9')
+            >>> q.query('mo_7i', period_range=(2019, 2024), geoitem='pv31', dim_sbi_1='industrie')
+
+        Args:
+            indicator (str): indicator code, e.g. 'mo_7i'.
+            period_range (tuple, optional): inclusive (start, end) range of periods, use None for an open bound.
+                Defaults to None.
+            **filters: key column filters, each either a single value or a list of values.
+
+        Returns:
+            pd.DataFrame: matching rows.
+        """
+        index = self.get_index(indicator)
+        if period_range is not None:
+            period_range = tuple(period_range)
+
+        cache_key = (indicator, period_range, tuple(sorted((col, _freeze(v)) for col, v in filters.items())))
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+
+        df_slice = index.select(period_range=period_range, **filters)
+
+        self._cache[cache_key] = df_slice
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return df_slice
+
+    def clear_cache(self) -> None:
+        """Clear all materialized slices."""
+        self._cache.clear()
+
+    def _invalidate(self, indicator: str) -> None:
+        """Drop the cached slices of an indicator."""
+        for key in [key for key in self._cache if key[0] == indicator]:
+            del self._cache[key]
+
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+def _normalize_value(value: Hashable) -> Hashable:
+    """Normalize a key value, so that e.g. numpy and python integers hash to the same entry."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+
+def _to_period(value: Hashable) -> Hashable:
+    """Convert a period filter value to the number it is indexed by, e.g. '2023' to 2023."""
+    number = pd.to_numeric(value, errors='coerce')
+    return value if pd.isna(number) else _normalize_value(number)
+
+
+def _is_multi_value(values) -> bool:
+    """Check whether a filter value holds multiple values, e.g. a list, numpy array or pd.Series."""
+    return isinstance(values, Iterable) and not isinstance(values, (str, bytes))
+
+
+def _freeze(values: Hashable | Sequence[Hashable]) -> Hashable:
+    """Make a filter value hashable for use as cache key, independent of the order of multiple values."""
+    if _is_multi_value(values):
+        return frozenset(_normalize_value(v) for v in values)
+    return _normalize_value(values)
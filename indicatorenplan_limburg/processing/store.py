@@ -0,0 +1,283 @@
+"""Partitioned, append-only store for indicator outputs.
+
+The output of an indicator is stored as one csv partition per `period`, plus one csv per metadata sheet. A manifest
+keeps the file, row count, column dtypes and content hash of every partition, so that only new or changed partitions
+are written and the partitions are read back with the dtypes they were written with.
+
+Partition files are named after their content hash and never overwritten: a changed partition is written to a new
+file, the manifest is atomically replaced to point to it and only then the superseded file is removed. Changes to the
+manifest and the publish state are made while holding an exclusive lock on the store, so concurrent runs do not drop
+each other's partitions. The publication workbook is assembled from the partitions only when requested, and only if
+the partitions changed since it was last published.
+"""
+import hashlib
+import json
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from indicatorenplan_limburg.processing.files import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MANIFEST_FILENAME = "manifest.json"
+PUBLISHED_FILENAME = "published.json"
+LOCK_FILENAME = ".lock"
+DATA_SHEET_NAME = 'processing'
+
+# dtypes that are read back as strings, e.g. codes such as geoitem '0917' keep their leading zero
+STRING_DTYPES = ('object', 'string', 'str')
+
+
+def _hash_text(text: str) -> str:
+    """Hash the content of a partition."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _dtype_entry(dtype) -> str | dict:
+    """Describe a column dtype for the manifest. Categoricals include their categories and ordering."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {
+            'dtype': 'category',
+            'categories': dtype.categories.tolist(),
+            'categories_dtype': str(dtype.categories.dtype),
+            'ordered': bool(dtype.ordered),
+        }
+    return str(dtype)
+
+
+def _read_csv(path_file: Path, dtypes: dict | None = None) -> pd.DataFrame:
+    """Read a partition with the column dtypes recorded in the manifest.
+
+    Text columns are read as strings, floats are parsed exactly and categoricals are rebuilt with their categories
+    and ordering, so that the data read equals the data written.
+    """
+    dtypes = dtypes or {}
+    categoricals = {col: entry for col, entry in dtypes.items() if isinstance(entry, dict)}
+    plain_dtypes = {col: entry['categories_dtype'] for col, entry in categoricals.items()}
+    plain_dtypes.update({col: entry for col, entry in dtypes.items() if col not in categoricals})
+
+    parse_dates = [col for col, dtype in plain_dtypes.items() if dtype.startswith('datetime64')]
+    dtype = {col: str if dtype in STRING_DTYPES else dtype
+             for col, dtype in plain_dtypes.items() if col not in parse_dates}
+    df = pd.read_csv(path_file, dtype=dtype, parse_dates=parse_dates, float_precision='round_trip')
+
+    for col, entry in categoricals.items():
+        df[col] = df[col].astype(pd.CategoricalDtype(entry['categories'], ordered=entry['ordered']))
+    return df
+
+
+class OutputStore:
+    """Store for the output of a single indicator, partitioned by `period`.
+
+    Args:
+        root (str | Path): root directory of the store.
+        indicator (str): indicator code, e.g. 'mo_7i'. The partitions are stored in a subfolder with this name.
+    """
+
+    def __init__(self, root: str | Path, indicator: str):
+        self.indicator = indicator
+        self.path = Path(root).expanduser() / indicator
+        self.path_manifest = self.path / MANIFEST_FILENAME
+        self.path_published = self.path / PUBLISHED_FILENAME
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock on the store, across processes."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / LOCK_FILENAME, 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def read_manifest(self) -> dict:
+        """Read the manifest of the store."""
+        if not self.path_manifest.exists():
+            return {'indicator': self.indicator, 'partitions': {}, 'metadata': {}}
+        return json.loads(self.path_manifest.read_text())
+
+    def write_manifest(self, manifest: dict) -> None:
+        """Write the manifest of the store atomically. Should be called while holding the lock."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(manifest, indent=2)
+        atomic_write(self.path_manifest, lambda path_tmp: path_tmp.write_text(text))
+
+    @property
+    def periods(self) -> list[str]:
+        """Get the stored periods, in sorted order."""
+        return sorted(self.read_manifest()['partitions'], key=_period_sort_key)
+
+    def write(self, df_data: pd.DataFrame, metadata_dict: dict | None = None) -> list[str]:
+        """Write the data per period, only adding partitions that are new or changed.
+
+        Periods that are stored but not present in `df_data` are kept as is.
+
+        Args:
+            df_data (pd.DataFrame): indicator output with a `period` column.
+            metadata_dict (dict, optional): metadata sheets by name. Defaults to None.
+
+        Returns:
+            list[str]: names of the partitions and metadata sheets that were written, e.g. 'period=2024'.
+        """
+        if 'period' not in df_data.columns:
+            raise ValueError("DataFrame has no 'period' column")
+        if df_data['period'].isna().any():
+            raise ValueError("DataFrame has rows without 'period', these cannot be partitioned")
+
+        with self.lock():
+            manifest = self.read_manifest()
+            written = []
+            superseded = []
+
+            for period, df_period in df_data.groupby('period', sort=True):
+                key = _period_key(period)
+                if self._write_partition(manifest['partitions'], key, f"period={key}", df_period, superseded):
+                    written.append(f"period={key}")
+
+            for sheet_name, df_meta in (metadata_dict or {}).items():
+                if self._write_partition(manifest['metadata'], sheet_name, f"meta={sheet_name}", df_meta, superseded):
+                    written.append(f"meta={sheet_name}")
+
+            # partitions are in place before the manifest that refers to them, and superseded partitions are only
+            # removed once the manifest no longer refers to them
+            if written:
+                self.write_manifest(manifest)
+            for filename in superseded:
+                (self.path / filename).unlink(missing_ok=True)
+        return written
+
+    def read(self, periods=None) -> pd.DataFrame:
+        """Read the data of the given periods, or all periods, in period order.
+
+        Args:
+            periods (Sequence, optional): periods to read. Defaults to None, which reads all periods.
+
+        Returns:
+            pd.DataFrame: the data.
+        """
+        with self.lock():
+            return self._read_partitions(self.read_manifest(), periods=periods)
+
+    def read_metadata(self) -> dict:
+        """Read the metadata sheets, in the order they were first written."""
+        with self.lock():
+            return self._read_metadata(self.read_manifest())
+
+    def publish(self, path_file: str | Path, force: bool = False) -> bool:
+        """Assemble the publication workbook from the partitions, if they changed since it was last published.
+
+        Args:
+            path_file (str | Path): path of the workbook.
+            force (bool, optional): rebuild the workbook even if it is up to date. Defaults to False.
+
+        Returns:
+            bool: whether the workbook was (re)built.
+        """
+        path_file = Path(path_file).expanduser()
+
+        # the hash and the partitions are taken from the same manifest, which cannot change while holding the lock
+        with self.lock():
+            manifest = self.read_manifest()
+            content_hash = self._content_hash(manifest)
+
+            published = self._read_published()
+            if not force and path_file.exists() and published.get(str(path_file)) == content_hash:
+                print(f"Data in {path_file} is up to date")
+                return False
+
+            df_data = self._read_partitions(manifest)
+            metadata_dict = self._read_metadata(manifest)
+
+            def _write_workbook(path_tmp: Path) -> None:
+                with pd.ExcelWriter(path_tmp, engine='openpyxl') as writer:
+                    df_data.to_excel(writer, sheet_name=DATA_SHEET_NAME, index=False)
+                    for sheet_name, df_meta in metadata_dict.items():
+                        df_meta.to_excel(writer, sheet_name=sheet_name, index=False)
+
+            path_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path_file, _write_workbook)
+
+            published[str(path_file)] = content_hash
+            text = json.dumps(published, indent=2)
+            atomic_write(self.path_published, lambda path_tmp: path_tmp.write_text(text))
+
+        print(f"Data saved to {path_file}")
+        return True
+
+    def _write_partition(self, entries: dict, key: str, name: str, df: pd.DataFrame, superseded: list) -> bool:
+        """Write a single partition to a new file if its content changed, and update its manifest entry.
+
+        The file of the previous version is added to `superseded`, to be removed once the manifest is replaced.
+        """
+        text = df.to_csv(index=False)
+        dtypes = {str(col): _dtype_entry(dtype) for col, dtype in df.dtypes.items()}
+        content_hash = _hash_text(json.dumps(dtypes) + text)
+        entry = entries.get(key)
+        if entry and entry['hash'] == content_hash and (self.path / entry['file']).exists():
+            return False
+
+        filename = f"{name}.{content_hash[:12]}.csv"
+        atomic_write(self.path / filename, lambda path_tmp: path_tmp.write_text(text, encoding='utf-8'))
+        if entry and entry['file'] != filename:
+            superseded.append(entry['file'])
+        entries[key] = {'file': filename, 'rows': len(df), 'dtypes': dtypes, 'hash': content_hash}
+        return True
+
+    def _read_partitions(self, manifest: dict, periods=None) -> pd.DataFrame:
+        """Read the data partitions listed in the given manifest, in period order."""
+        partitions = manifest['partitions']
+        keys = sorted(partitions, key=_period_sort_key)
+        if periods is not None:
+            keys = [key for key in keys if key in {_period_key(p) for p in periods}]
+        if not keys:
+            return pd.DataFrame()
+        return pd.concat([_read_csv(self.path / partitions[key]['file'], partitions[key].get('dtypes'))
+                          for key in keys], ignore_index=True)
+
+    def _read_metadata(self, manifest: dict) -> dict:
+        """Read the metadata sheets listed in the given manifest."""
+        return {name: _read_csv(self.path / entry['file'], entry.get('dtypes'))
+                for name, entry in manifest['metadata'].items()}
+
+    def _read_published(self) -> dict:
+        """Read the content hash of the store at the time each workbook was last published."""
+        if not self.path_published.exists():
+            return {}
+        return json.loads(self.path_published.read_text())
+
+    @staticmethod
+    def _content_hash(manifest: dict) -> str:
+        """Hash the content of the whole store from the hashes of its partitions."""
+        hashes = [(kind, key, entry['hash']) for kind in ('partitions', 'metadata')
+                  for key, entry in manifest[kind].items()]
+        return _hash_text(json.dumps(hashes))
+
+
+def _period_key(period) -> str:
+    """Get the partition key of a period, e.g. 2023 and 2023.0 both map to '2023'."""
+    if isinstance(period, float) and period.is_integer():
+        period = int(period)
+    return str(period)
+
+
+def _period_sort_key(period: str) -> tuple:
+    """Sort periods numerically where possible, e.g. '2023' before '2024'."""
+    try:
+        return 0, float(period), period
+    except ValueError:
+        return 1, 0.0, period
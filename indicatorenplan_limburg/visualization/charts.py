@@ -0,0 +1,240 @@
+"""Batch rendering of charts from indicator outputs.
+
+Charts are described by `ChartSpec`s and rendered headless with the non-interactive Agg backend across a process
+pool. Each worker reuses its figures between charts, and charts whose data slice and spec are unchanged since the
+previous run are skipped based on a content hash stored in a manifest next to the charts.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from indicatorenplan_limburg.configs.paths import get_path_data
+from indicatorenplan_limburg.processing.files import atomic_write
+from indicatorenplan_limburg.processing.query import IndicatorIndex
+
+MANIFEST_FILENAME = "charts_manifest.json"
+CHART_KINDS = ('bar', 'line')
+CHART_FORMATS = ('png', 'svg')
+
+# figures reused between charts within a worker process, keyed by figure size
+_FIGURE_TEMPLATES = {}
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Specification of a single chart.
+
+    Args:
+        indicator (str): indicator code of the output to plot, e.g. 'mo_7i'.
+        name (str): file name of the chart, without extension.
+        x (str): column on the x-axis.
+        y (str): column on the y-axis, usually the indicator value.
+        hue (str, optional): column to split the data by color. Defaults to None.
+        kind (str, optional): 'bar' or 'line'. Defaults to 'bar'.
+        title (str, optional): chart title. Defaults to None.
+        filters (tuple, optional): key column filters as (column, value) pairs, passed to
+            `IndicatorIndex.select`. Defaults to ().
+        period_range (tuple, optional): inclusive (start, end) range of periods. Defaults to None.
+        fmt (str, optional): 'png' or 'svg'. Defaults to 'png'.
+        figsize (tuple, optional): figure size in inches. Defaults to (8, 5).
+        dpi (int, optional): resolution of png charts. Defaults to 100.
+    """
+    indicator: str
+    name: str
+    x: str
+    y: str
+    hue: str | None = None
+    kind: str = 'bar'
+    title: str | None = None
+    filters: tuple = ()
+    period_range: tuple | None = None
+    fmt: str = 'png'
+    figsize: tuple = (8, 5)
+    dpi: int = 100
+
+    def __post_init__(self):
+        if self.kind not in CHART_KINDS:
+            raise ValueError(f"Unknown chart kind '{self.kind}', choose from {CHART_KINDS}")
+        if self.fmt not in CHART_FORMATS:
+            raise ValueError(f"Unknown chart format '{self.fmt}', choose from {CHART_FORMATS}")
+
+    @property
+    def filename(self) -> str:
+        """Get the file name of the chart, including extension."""
+        return f"{self.name}.{self.fmt}"
+
+
+def make_specs(indicator: str, df: pd.DataFrame, split_by: str | Sequence[str], x: str, y: str,
+               hue: str | None = None, kind: str = 'bar', fmt: str = 'png',
+               period_range: tuple | None = None) -> list[ChartSpec]:
+    """Make one chart spec per unique combination of the `split_by` columns, e.g. one chart per sector.
+
+    Combinations with a missing value are skipped, as they cannot be selected. The values are made safe for use in
+    file names, e.g. 'a/b' becomes 'a_b'.
+
+    Args:
+        indicator (str): indicator code, e.g. 'mo_7i'.
+        df (pd.DataFrame): indicator output.
+        split_by (str | Sequence[str]): column(s) to create separate charts for.
+        x (str): column on the x-axis.
+        y (str): column on the y-axis.
+        hue (str, optional): column to split the data by color. Defaults to None.
+        kind (str, optional): 'bar' or 'line'. Defaults to 'bar'.
+        fmt (str, optional): 'png' or 'svg'. Defaults to 'png'.
+        period_range (tuple, optional): inclusive (start, end) range of periods. Defaults to None.
+
+    Returns:
+        list[ChartSpec]: chart specs.
+    """
+    if isinstance(split_by, str):
+        split_by = [split_by]
+
+    specs = []
+    for values in df[list(split_by)].drop_duplicates().dropna().itertuples(index=False, name=None):
+        filters = tuple(zip(split_by, values))
+        specs.append(ChartSpec(
+            indicator=indicator,
+            name=_safe_filename('_'.join([indicator, *(str(v) for v in values)])),
+            x=x,
+            y=y,
+            hue=hue,
+            kind=kind,
+            title=' - '.join([indicator, *(str(v) for v in values)]),
+            filters=filters,
+            period_range=period_range,
+            fmt=fmt,
+        ))
+    return specs
+
+
+def _safe_filename(name: str) -> str:
+    """Replace characters that are not safe in file names, such as path separators, by underscores."""
+    return re.sub(r'[^\w.-]', '_', name).lstrip('.')
+
+
+def hash_chart(spec: ChartSpec, df_slice: pd.DataFrame) -> str:
+    """Hash the content of a chart: its spec and the data slice it plots."""
+    h = hashlib.sha256()
+    h.update(json.dumps(asdict(spec), sort_keys=True, default=str).encode())
+    h.update(','.join(map(str, df_slice.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df_slice, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def render_charts(outputs: Mapping[str, pd.DataFrame], specs: Sequence[ChartSpec], save_path: str | Path | None = None,
+                  max_workers: int | None = None, force: bool = False) -> list[Path]:
+    """Render charts from indicator outputs, skipping charts whose data and spec are unchanged.
+
+    Args:
+        outputs (Mapping[str, pd.DataFrame]): indicator output per indicator code.
+        specs (Sequence[ChartSpec]): charts to render.
+        save_path (str | Path, optional): directory to save the charts to. Defaults to None, which saves to the
+            'charts' data folder.
+        max_workers (int, optional): number of worker processes. Defaults to None, which uses all cores. With a
+            single worker the charts are rendered in the current process.
+        force (bool, optional): render all charts, even if unchanged. Defaults to False.
+
+    Returns:
+        list[Path]: paths of the rendered charts; skipped charts are not included.
+    """
+    # charts with the same file name would overwrite each other's file and manifest entry
+    duplicates = sorted(filename for filename, n in Counter(spec.filename for spec in specs).items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Chart specs have duplicate file names: {duplicates}")
+
+    if save_path is None:
+        save_path = get_path_data(name='charts')
+    save_path = Path(save_path).expanduser()
+    save_path.mkdir(parents=True, exist_ok=True)
+
+    path_manifest = save_path / MANIFEST_FILENAME
+    manifest = json.loads(path_manifest.read_text()) if path_manifest.exists() else {}
+
+    # slice the data for every chart and keep only the charts that changed
+    indexes = {indicator: IndicatorIndex(df) for indicator, df in outputs.items()}
+    jobs = []
+    for spec in specs:
+        df_slice = indexes[spec.indicator].select(period_range=spec.period_range, **dict(spec.filters))
+        content_hash = hash_chart(spec, df_slice)
+        if not force and manifest.get(spec.filename) == content_hash and (save_path / spec.filename).exists():
+            continue
+        jobs.append((spec, df_slice, save_path / spec.filename, content_hash))
+
+    if not jobs:
+        print(f"All {len(specs)} charts are up to date in {save_path}")
+        return []
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+
+    tasks = [job[:3] for job in jobs]
+    if max_workers == 1:
+        rendered = [_render_chart(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            rendered = list(executor.map(_render_chart, tasks, chunksize=chunksize))
+
+    # only record the hashes once the charts have been written
+    for spec, _, _, content_hash in jobs:
+        manifest[spec.filename] = content_hash
+    text = json.dumps(manifest, indent=2, sort_keys=True)
+    atomic_write(path_manifest, lambda path_tmp: path_tmp.write_text(text))
+
+    print(f"Rendered {len(rendered)} of {len(specs)} charts to {save_path}")
+    return rendered
+
+
+def _init_worker() -> None:
+    """Select the non-interactive Agg backend before any figure is created."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _get_figure(figsize: tuple, dpi: int):
+    """Get a cleared figure of the given size, reusing the figure of a previous chart when possible.
+
+    Figures are created without pyplot, so they are not tracked by the pyplot state machine and rendering in the
+    current process does not touch the interactive backend of the caller.
+    """
+    from matplotlib.figure import Figure
+
+    key = (tuple(figsize), dpi)
+    fig = _FIGURE_TEMPLATES.get(key)
+    if fig is None:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        _FIGURE_TEMPLATES[key] = fig
+    else:
+        fig.clf()
+    return fig
+
+
+def _render_chart(task: tuple[ChartSpec, pd.DataFrame, Path]) -> Path:
+    """Render a single chart to file."""
+    import seaborn as sns
+
+    spec, df_slice, path_file = task
+    fig = _get_figure(spec.figsize, spec.dpi)
+    ax = fig.add_subplot()
+
+    if spec.kind == 'bar':
+        sns.barplot(data=df_slice, x=spec.x, y=spec.y, hue=spec.hue, ax=ax)
+    elif spec.kind == 'line':
+        sns.lineplot(data=df_slice, x=spec.x, y=spec.y, hue=spec.hue, ax=ax, marker='o')
+
+    if spec.title:
+        ax.set_title(spec.title)
+    fig.tight_layout()
+
+    # write to a temporary file first, so that an interrupted run never leaves a partial chart behind
+    atomic_write(path_file, lambda path_tmp: fig.savefig(path_tmp, format=spec.fmt))
+    return path_file
@@ -0,0 +1,16 @@
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def make_indicator_output():
+    """Factory for a small indicator output in the standard `period/geolevel/geoitem/dim_*` format."""
+
+    def _make_indicator_output(years, value=1) -> pd.DataFrame:
+        return pd.DataFrame([
+            {'period': year, 'geolevel': 'prov_code', 'geoitem': 'pv31', 'dim_sbi_1': sbi, 'dim_grootte_1': size,
+             'mo-7i': value}
+            for year in years for sbi in ('bouwnijverheid', 'industrie') for size in ('0_9', '10_49')
+        ])
+
+    return _make_indicator_output
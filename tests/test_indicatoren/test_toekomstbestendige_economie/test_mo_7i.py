@@ -59,3 +59,39 @@ def test_mo_7i_output(state='test'):
     df = pd.read_excel(path_file, engine='openpyxl')
     assert df is not None, f"Output file {path_file} is empty."
 
+
+
+def _make_data_vrl(year: int) -> pd.DataFrame:
+    """Create processed VRL data for a year, as it comes out of `transform_data_vrl` and is sorted in `main`."""
+    df = pd.DataFrame({
+        'PEILDATUM': [f'{year}-01-01'] * 30,
+        'SBI_1_NAAM': ['Industrie', 'Onderwijs', 'Industrie'] * 10,
+        'WP_FPU_TOTAAL': [1, 20, 300] * 10,
+    })
+    df = mo_7i.transform_data_vrl(df)
+    return df.sort_values(by=['period', 'dim_sbi_1', 'dim_grootte_1'])
+
+
+def test_save_data_appends_periods(tmp_path, capsys):
+    """Saving a new year keeps the earlier years in the workbook, saving the same data does not rebuild it."""
+    metadata_dict = mo_7i.get_metadata()
+    path_file = tmp_path / mo_7i.OUTPUT_FILENAME
+
+    mo_7i.save_data(_make_data_vrl(2023), metadata_dict, save_path=tmp_path)
+    mo_7i.save_data(_make_data_vrl(2024), metadata_dict, save_path=tmp_path)
+
+    sheets = pd.read_excel(path_file, sheet_name=None, engine='openpyxl')
+    assert list(sheets) == ['processing', *metadata_dict]
+
+    df = sheets['processing']
+    assert df['period'].tolist() == [2023] * 10 + [2024] * 10
+    df_expected = pd.concat([_make_data_vrl(2023), _make_data_vrl(2024)], ignore_index=True)
+    assert df['dim_sbi_1'].tolist() == df_expected['dim_sbi_1'].tolist()
+    assert df['dim_grootte_1'].astype(str).tolist() == df_expected['dim_grootte_1'].astype(str).tolist()
+
+    # saving the same data again does not rebuild the workbook
+    mtime = path_file.stat().st_mtime_ns
+    capsys.readouterr()
+    mo_7i.save_data(_make_data_vrl(2024), metadata_dict, save_path=tmp_path)
+    assert "up to date" in capsys.readouterr().out
+    assert path_file.stat().st_mtime_ns == mtime
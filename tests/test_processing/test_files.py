@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from indicatorenplan_limburg.processing.files import atomic_write
+
+
+def test_atomic_write_follows_umask(tmp_path):
+    path_file = tmp_path / "data.csv"
+    umask = os.umask(0o022)
+    try:
+        atomic_write(path_file, lambda path_tmp: path_tmp.write_text("a,b\n1,2\n"))
+        # the umask of the process is left as is
+        assert os.umask(0o022) == 0o022
+    finally:
+        os.umask(umask)
+
+    assert path_file.read_text() == "a,b\n1,2\n"
+    assert path_file.stat().st_mode & 0o777 == 0o644
+    assert list(tmp_path.iterdir()) == [path_file]
+
+
+def test_atomic_write_keeps_file_on_error(tmp_path):
+    path_file = tmp_path / "data.csv"
+    path_file.write_text("old")
+
+    def _fail(path_tmp):
+        path_tmp.write_text("partial")
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path_file, _fail)
+    assert path_file.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path_file]
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+import pandas as pd
+
+from indicatorenplan_limburg.processing.query import IndicatorQuery, IndicatorIndex
+
+
+@pytest.fixture
+def write_output(make_indicator_output):
+    """Write a small indicator output to an excel file, as saved by the indicators."""
+
+    def _write_output(path, years, value=1):
+        df = make_indicator_output(years, value=value)
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='processing', index=False)
+        return df
+
+    return _write_output
+
+
+def test_point_and_range_queries(tmp_path, write_output):
+    path = tmp_path / "mo_7i.xlsx"
+    write_output(path, years=range(2018, 2025))
+    q = IndicatorQuery(paths={'mo_7i': path})
+
+    df = q.query('mo_7i', period=2024, geoitem='pv31', dim_sbi_1='industrie', dim_grootte_1='0_9')
+    assert len(df) == 1
+
+    df = q.query('mo_7i', period_range=(2019, 2024), geoitem='pv31', dim_sbi_1='industrie')
+    assert len(df) == 12
+    assert df['period'].between(2019, 2024).all()
+    assert set(df['dim_grootte_1']) == {'0_9', '10_49'}
+
+    df = q.query('mo_7i', dim_sbi_1=['industrie', 'bouwnijverheid'], period_range=(2024, None))
+    assert len(df) == 4
+
+    assert q.query('mo_7i', dim_sbi_1='onbekend').empty
+
+    # a list is accepted as period range as well
+    assert len(q.query('mo_7i', period_range=[2019, 2024], dim_sbi_1='industrie')) == 12
+
+    with pytest.raises(KeyError):
+        q.query('mo_7i', unknown_column='x')
+
+
+def test_string_periods():
+    """Periods stored as strings, as built by mo_11a, are found by point and range filters alike."""
+    df = pd.DataFrame({'period': ['2022', '2023'], 'geolevel': 'corop_id', 'geoitem': 'NL_LIM_NL',
+                       'df_mo_11a': [3.5, 4.8]})
+    index = IndicatorIndex(df)
+    assert len(index.select(period=2023)) == 1
+    assert len(index.select(period='2023')) == 1
+    assert len(index.select(period_range=(2023, 2023))) == 1
+    assert len(index.select(period=[2022, 2023])) == 2
+
+
+def test_non_numeric_periods():
+    df = pd.DataFrame({'period': ['2023Q1', '2023Q2', '2024'], 'geolevel': 'prov_code', 'geoitem': 'pv31',
+                       'mo-7i': [1, 2, 3]})
+    index = IndicatorIndex(df)
+    assert index.select(period='2023Q1')['mo-7i'].tolist() == [1]
+    assert index.select(period=2024)['mo-7i'].tolist() == [3]
+
+
+def test_array_filters(tmp_path, write_output):
+    path = tmp_path / "mo_7i.xlsx"
+    df = write_output(path, years=[2023, 2024])
+    q = IndicatorQuery(paths={'mo_7i': path})
+
+    assert len(q.query('mo_7i', dim_sbi_1=df['dim_sbi_1'].unique())) == 8
+    assert len(q.query('mo_7i', dim_sbi_1=pd.Series(['industrie']))) == 4
+    assert len(q.query('mo_7i', dim_sbi_1=pd.Index(['industrie', 'bouwnijverheid']))) == 8
+    # mixed types cannot be sorted, but are valid filters
+    assert len(q.query('mo_7i', dim_sbi_1=[None, 'industrie'])) == 4
+
+
+def test_cached_slice_is_reused(tmp_path, write_output):
+    path = tmp_path / "mo_7i.xlsx"
+    write_output(path, years=[2023, 2024])
+    q = IndicatorQuery(paths={'mo_7i': path}, cache_size=1)
+
+    df_first = q.query('mo_7i', period=2024)
+    assert q.query('mo_7i', period=2024) is df_first
+
+    # cache holds a single slice, so the first one is evicted
+    q.query('mo_7i', period=2023)
+    assert q.query('mo_7i', period=2024) is not df_first
+
+
+def test_reload_on_changed_output(tmp_path, write_output):
+    path = tmp_path / "mo_7i.xlsx"
+    write_output(path, years=[2023], value=1)
+    q = IndicatorQuery(paths={'mo_7i': path}, check_interval=0)
+    assert (q.query('mo_7i', period=2023)['mo-7i'] == 1).all()
+
+    write_output(path, years=[2023, 2024], value=2)
+    # make sure the fingerprint changes, even on file systems with a coarse mtime resolution
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert (q.query('mo_7i', period=2023)['mo-7i'] == 2).all()
+    assert len(q.query('mo_7i', period=2024)) == 4
+
+
+def test_index_requires_period():
+    with pytest.raises(ValueError):
+        IndicatorIndex(pd.DataFrame({'geoitem': ['pv31']}))
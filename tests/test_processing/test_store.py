@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import pandas as pd
+
+from indicatorenplan_limburg.processing.store import OutputStore, LOCK_FILENAME
+
+
+def test_write_only_new_or_changed_partitions(tmp_path, make_indicator_output):
+    store = OutputStore(root=tmp_path, indicator='mo_7i')
+    metadata_dict = {'dim_geoitem': pd.DataFrame({'itemcode': ['pv31'], 'Name': ['Provincie Limburg']})}
+
+    written = store.write(make_indicator_output([2023, 2024]), metadata_dict)
+    assert written == ['period=2023', 'period=2024', 'meta=dim_geoitem']
+
+    # rewriting the same data is a no-op
+    assert store.write(make_indicator_output([2023, 2024]), metadata_dict) == []
+
+    # a new period only writes that partition, earlier periods are kept
+    assert store.write(make_indicator_output([2025])) == ['period=2025']
+    assert store.periods == ['2023', '2024', '2025']
+
+    # a changed period is written to a new file, the superseded file is removed
+    file_2024 = store.read_manifest()['partitions']['2024']['file']
+    assert store.write(make_indicator_output([2024], value=2)) == ['period=2024']
+
+    manifest = store.read_manifest()
+    assert manifest['partitions']['2024']['rows'] == 4
+    assert manifest['partitions']['2024']['file'] != file_2024
+    assert not (store.path / file_2024).exists()
+
+    df = store.read()
+    assert df['period'].tolist() == [2023] * 4 + [2024] * 4 + [2025] * 4
+    assert df.loc[df['period'] == 2024, 'mo-7i'].eq(2).all()
+    assert store.read(periods=[2025])['period'].eq(2025).all()
+
+    # no temporary files or unreferenced partitions left behind
+    assert [path.name for path in store.path.glob('.*')] == [LOCK_FILENAME]
+    assert len(list(store.path.glob('*.csv'))) == 4
+
+
+def test_publish_only_when_changed(tmp_path, make_indicator_output):
+    store = OutputStore(root=tmp_path / 'store', indicator='mo_7i')
+    path_file = tmp_path / 'output.xlsx'
+    metadata_dict = {'dim_geoitem': pd.DataFrame({'itemcode': ['pv31'], 'Name': ['Provincie Limburg']})}
+    store.write(make_indicator_output([2023]), metadata_dict)
+
+    assert store.publish(path_file)
+    assert not store.publish(path_file)
+
+    store.write(make_indicator_output([2024]))
+    assert store.publish(path_file)
+
+    sheets = pd.read_excel(path_file, sheet_name=None, engine='openpyxl')
+    assert list(sheets) == ['processing', 'dim_geoitem']
+    assert sheets['processing']['period'].tolist() == [2023] * 4 + [2024] * 4
+
+
+def test_write_requires_period(tmp_path, make_indicator_output):
+    store = OutputStore(root=tmp_path, indicator='mo_7i')
+    df = make_indicator_output([2023, None])
+    with pytest.raises(ValueError):
+        store.write(df)
+    with pytest.raises(ValueError):
+        store.write(df.drop(columns='period'))
+
+
+def test_read_equals_written(tmp_path, make_indicator_output):
+    """Codes keep their leading zeros, floats their full precision and categoricals their categories and order."""
+    store = OutputStore(root=tmp_path, indicator='mo_11a')
+    df = make_indicator_output([2023, 2024])
+    df['geoitem'] = '0917'
+    df['mo-7i'] = 0.1 + 0.2
+    df['dim_grootte_1'] = pd.Categorical(df['dim_grootte_1'], categories=('0_9', '10_49', '50_99'), ordered=True)
+    metadata_dict = {'dim_geoitem': pd.DataFrame({'itemcode': ['0917'], 'Name': ['Limburg'], 'RoundOff': [1]})}
+    store.write(df, metadata_dict)
+
+    pd.testing.assert_frame_equal(store.read(), df)
+    pd.testing.assert_frame_equal(store.read_metadata()['dim_geoitem'], metadata_dict['dim_geoitem'])
+
+
+def test_files_follow_umask(tmp_path, make_indicator_output):
+    umask = os.umask(0o022)
+    try:
+        store = OutputStore(root=tmp_path / 'store', indicator='mo_7i')
+        store.write(make_indicator_output([2023]))
+        store.publish(tmp_path / 'output.xlsx')
+    finally:
+        os.umask(umask)
+
+    path_partition = store.path / store.read_manifest()['partitions']['2023']['file']
+    for path_file in (tmp_path / 'output.xlsx', path_partition, store.path_manifest):
+        assert path_file.stat().st_mode & 0o777 == 0o644
+
+
+def test_concurrent_writes_keep_all_periods(tmp_path, make_indicator_output):
+    store = OutputStore(root=tmp_path, indicator='mo_7i')
+    years = range(2010, 2026)
+
+    def _write(year):
+        # a separate store object per writer, as in separate runs
+        OutputStore(root=tmp_path, indicator='mo_7i').write(make_indicator_output([year]))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(_write, years))
+
+    assert store.periods == [str(year) for year in years]
+    assert len(store.read()) == 4 * len(years)
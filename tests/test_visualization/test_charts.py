@@ -0,0 +1,52 @@
+import pytest
+import pandas as pd
+
+from indicatorenplan_limburg.visualization import charts
+
+
+def test_make_specs(make_indicator_output):
+    df = make_indicator_output([2023, 2024])
+    specs = charts.make_specs('mo_7i', df, split_by='dim_sbi_1', x='period', y='mo-7i', hue='dim_grootte_1')
+    assert {spec.filename for spec in specs} == {'mo_7i_industrie.png', 'mo_7i_bouwnijverheid.png'}
+
+    with pytest.raises(ValueError):
+        charts.ChartSpec(indicator='mo_7i', name='x', x='period', y='mo-7i', kind='pie')
+
+
+def test_make_specs_safe_names(make_indicator_output):
+    df = make_indicator_output([2023])
+    df['geoitem'] = ['a/b', 'a/b', None, None]
+    specs = charts.make_specs('mo_11a', df, split_by='geoitem', x='period', y='mo-7i')
+
+    # missing values are skipped and path separators are replaced
+    assert [spec.filename for spec in specs] == ['mo_11a_a_b.png']
+    assert specs[0].filters == (('geoitem', 'a/b'),)
+
+
+def test_render_charts_rejects_duplicate_names(tmp_path, make_indicator_output):
+    df = make_indicator_output([2023])
+    spec = charts.ChartSpec(indicator='mo_7i', name='mo_7i', x='period', y='mo-7i')
+    with pytest.raises(ValueError, match="duplicate"):
+        charts.render_charts({'mo_7i': df}, [spec, spec], save_path=tmp_path)
+
+
+def test_render_charts_skips_unchanged(tmp_path, make_indicator_output):
+    df = make_indicator_output([2023, 2024])
+    specs = charts.make_specs('mo_7i', df, split_by='dim_sbi_1', x='period', y='mo-7i', hue='dim_grootte_1')
+    specs.append(charts.ChartSpec(indicator='mo_7i', name='mo_7i_totaal', x='period', y='mo-7i', kind='line',
+                                  fmt='svg'))
+
+    rendered = charts.render_charts({'mo_7i': df}, specs, save_path=tmp_path, max_workers=2)
+    assert len(rendered) == 3
+    assert all(path.exists() for path in rendered)
+    assert (tmp_path / charts.MANIFEST_FILENAME).exists()
+    # no temporary files left behind
+    assert not list(tmp_path.glob('.*'))
+
+    # nothing changed, nothing to render
+    assert charts.render_charts({'mo_7i': df}, specs, save_path=tmp_path, max_workers=1) == []
+
+    # only the charts of the changed sector are rendered again
+    df.loc[df['dim_sbi_1'] == 'industrie', 'mo-7i'] = 2
+    rendered = charts.render_charts({'mo_7i': df}, specs, save_path=tmp_path, max_workers=1)
+    assert {path.name for path in rendered} == {'mo_7i_industrie.png', 'mo_7i_totaal.svg'}